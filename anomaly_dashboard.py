@@ -6,13 +6,15 @@ Modern UI design with card-based layout.
 import streamlit as st
 import pandas as pd
 import numpy as np
+import hashlib
+import io
 import sys
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from ts_data_loader import load_time_series_data, validate_time_series_data
+from ts_data_loader import preprocess_time_series_data, validate_time_series_data
 from anomaly_detector import detect_anomalies_in_time_series
 from ts_visualizer import create_time_series_plot, create_z_score_plot
 
@@ -23,259 +25,136 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+
+@st.cache_data(show_spinner=False)
+def _load_css() -> str:
+    """Read the dashboard stylesheet once"""
+    return (Path(__file__).parent / 'assets' / 'styles.css').read_text()
+
+
 # Custom CSS for modern design
-st.markdown("""
-    <style>
-    /* Main background - light green */
-    .stApp {
-        background: #d4edda;
-        background-attachment: fixed;
-    }
-    
-    /* Main container */
-    .main .block-container {
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-        box-shadow: none !important;
-    }
-    
-    /* Remove shadows from all Streamlit containers */
-    .main .block-container > div,
-    .main .block-container > div > div {
-        box-shadow: none !important;
-    }
-    
-    /* Header styling - normal text */
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        color: #333;
-        text-align: center;
-        margin-bottom: 0.5rem;
-    }
-    
-    .sub-header {
-        font-size: 1.1rem;
-        color: #555;
-        text-align: center;
-        margin-bottom: 2rem;
-        font-weight: normal;
-    }
-    
-    /* Card styling */
-    .metric-card {
-        background: rgba(255, 255, 255, 0.95);
-        padding: 1.5rem;
-        border-radius: 20px;
-        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1);
-        border: 1px solid rgba(255, 255, 255, 0.3);
-        backdrop-filter: blur(10px);
-        margin-bottom: 1rem;
-    }
-    
-    .info-card {
-        background: rgba(255, 255, 255, 0.9);
-        padding: 2rem;
-        border-radius: 25px;
-        box-shadow: 0 10px 40px rgba(0, 0, 0, 0.15);
-        border: 2px solid rgba(255, 255, 255, 0.5);
-        backdrop-filter: blur(15px);
-        margin: 1rem 0;
-    }
-    
-    /* Sidebar styling */
-    [data-testid="stSidebar"] {
-        background: rgba(30, 30, 50, 0.95);
-        backdrop-filter: blur(20px);
-    }
-    
-    [data-testid="stSidebar"] .stMarkdown h1,
-    [data-testid="stSidebar"] .stMarkdown h2,
-    [data-testid="stSidebar"] .stMarkdown h3 {
-        color: #fff;
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 15px;
-        padding: 0.5rem 2rem;
-        font-weight: 600;
-        transition: all 0.3s;
-        box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(102, 126, 234, 0.6);
-    }
-    
-    /* Slider styling - black */
-    .stSlider [data-baseweb="slider-track"] {
-        background-color: #000000 !important;
-    }
-    
-    .stSlider [data-baseweb="slider-fill"] {
-        background-color: #000000 !important;
-    }
-    
-    .stSlider [data-baseweb="slider-handle"] {
-        background-color: #ffffff !important;
-        border: 2px solid #000000 !important;
-    }
-    
-    .stSlider [data-baseweb="slider-tick"] {
-        background-color: #000000 !important;
-    }
-    
-    /* File uploader */
-    .uploadedFile {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 15px;
-        padding: 1rem;
-    }
-    
-    /* Metrics - normal styling */
-    [data-testid="stMetricValue"] {
-        font-size: 1.8rem;
-        font-weight: 600;
-        color: #667eea;
-    }
-    
-    [data-testid="stMetricLabel"] {
-        font-size: 0.9rem;
-        color: #666;
-        font-weight: normal;
-    }
-    
-    /* Tabs - remove all shadows from every possible element */
-    .stTabs,
-    .stTabs *,
-    .stTabs > div,
-    .stTabs > div > div,
-    .stTabs > div > div > div,
-    .stTabs [data-baseweb="tab-list"],
-    .stTabs [data-baseweb="tab-list"] > div,
-    .stTabs [data-baseweb="tab-list"] > div > div,
-    [data-testid="stTabs"],
-    [data-testid="stTabs"] > div,
-    [data-testid="stTabs"] > div > div,
-    div[data-baseweb="tabs"],
-    .element-container:has(.stTabs),
-    .element-container:has([data-testid="stTabs"]) {
-        box-shadow: none !important;
-        filter: none !important;
-        -webkit-box-shadow: none !important;
-        -moz-box-shadow: none !important;
-        text-shadow: none !important;
-    }
-    
-    /* Specifically target the tab bar container */
-    .stTabs [data-baseweb="tab-list"] {
-        background: rgba(255, 255, 255, 0.5);
-        border-radius: 15px;
-        padding: 0.5rem;
-        box-shadow: none !important;
-        -webkit-box-shadow: none !important;
-        -moz-box-shadow: none !important;
-    }
-    
-    /* Remove shadow from parent containers of tabs */
-    div:has([data-baseweb="tab-list"]),
-    div:has([data-testid="stTabs"]) {
-        box-shadow: none !important;
-        -webkit-box-shadow: none !important;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        color: #333;
-        border-radius: 10px;
-    }
-    
-    /* Tab indicator - change from red to black */
-    .stTabs [data-baseweb="tab"][aria-selected="true"] {
-        border-bottom-color: #000000 !important;
-    }
-    
-    .stTabs [data-baseweb="tab-list"] [data-baseweb="tab-highlight"] {
-        background-color: #000000 !important;
-    }
-    
-    .stTabs [data-baseweb="tab-highlight"] {
-        background-color: #000000 !important;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        border-bottom: 2px solid #000000 !important;
-    }
-    
-    /* Expander */
-    .streamlit-expanderHeader {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 10px;
-        color: white;
-    }
-    
-    /* Checkbox styling - transparent background */
-    .stCheckbox > label {
-        color: #333 !important;
-    }
-    
-    .stCheckbox [data-baseweb="checkbox"] {
-        background-color: transparent !important;
-        border-color: #000000 !important;
-    }
-    
-    .stCheckbox [data-baseweb="checkbox"][aria-checked="true"] {
-        background-color: transparent !important;
-    }
-    
-    .stCheckbox [data-baseweb="checkbox"][aria-checked="true"] [data-baseweb="checkmark"] {
-        color: #000000 !important;
-    }
-    
-    /* Dataframe */
-    .dataframe {
-        border-radius: 15px;
-        overflow: hidden;
-    }
-    
-    /* Hide default Streamlit elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Aggressively remove all shadows from tabs and their parents */
-    div[class*="stTabs"],
-    div[data-baseweb="tabs"],
-    div[data-baseweb="tab-list"],
-    [data-testid="stTabs"],
-    [data-testid="stTabs"] *,
-    .element-container:has([data-baseweb="tab-list"]),
-    .element-container:has([data-testid="stTabs"]),
-    /* Target the immediate wrapper around tabs */
-    .stTabsContainer,
-    div[class*="element-container"]:has(.stTabs),
-    /* Remove shadow from any div containing tabs */
-    div:has(> [data-baseweb="tab-list"]),
-    div:has(> [data-testid="stTabs"]) {
-        box-shadow: none !important;
-        -webkit-box-shadow: none !important;
-        -moz-box-shadow: none !important;
-        filter: drop-shadow(none) !important;
-        text-shadow: none !important;
-    }
-    
-    /* Force remove shadow from the tab bar area specifically */
-    .main .block-container > div:first-child,
-    .main .block-container > div:first-child > div {
-        box-shadow: none !important;
-        -webkit-box-shadow: none !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{_load_css()}</style>", unsafe_allow_html=True)
+
+
+def _get_raw_frame(uploaded_file):
+    """Parse the uploaded CSV once per file, keeping the frame in session state"""
+    file_bytes = uploaded_file.getvalue()
+    file_hash = hashlib.md5(file_bytes).hexdigest()
+    if st.session_state.get('df_hash') != file_hash:
+        try:
+            st.session_state['df'] = pd.read_csv(io.BytesIO(file_bytes))
+        except Exception as e:
+            raise ValueError(f"Error reading CSV file: {str(e)}")
+        st.session_state['df_hash'] = file_hash
+    return st.session_state['df'], file_hash
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_cached(file_hash: str, timestamp_col: str, value_col: str, _raw_df: pd.DataFrame):
+    """Preprocess and validate the parsed CSV, cached on the file hash and columns.
+    Returns the frame and the overview metrics computed once at load time."""
+    df = preprocess_time_series_data(_raw_df, timestamp_col, value_col)
+    validate_time_series_data(df, timestamp_col, value_col)
+    
+    values = df[value_col].to_numpy()
+    meta = {
+        'n': len(df),
+        'ts_min': df[timestamp_col].min(),
+        'ts_max': df[timestamp_col].max(),
+        'val_min': float(np.min(values)),
+        'val_max': float(np.max(values)),
+        'val_mean': float(np.mean(values))
+    }
+    return df, meta
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _detect_cached(
+    file_hash: str,
+    timestamp_col: str,
+    value_col: str,
+    window_size: int,
+    threshold: float,
+    _raw_df: pd.DataFrame
+) -> pd.DataFrame:
+    """Run anomaly detection, cached on the file hash, columns and detection parameters"""
+    df, _ = _load_cached(file_hash, timestamp_col, value_col, _raw_df)
+    return detect_anomalies_in_time_series(
+        df,
+        value_column=value_col,
+        window_size=window_size,
+        threshold=threshold
+    )
+
+
+def _build_anomaly_table(df_analyzed, timestamp_col, value_col):
+    """Anomalous rows sorted by |z-score|, built with a single index selection"""
+    idx = np.flatnonzero(df_analyzed['is_anomaly'].to_numpy(dtype=np.bool_))
+    z_scores = df_analyzed['z_score'].to_numpy()[idx]
+    order = np.argsort(-np.abs(z_scores), kind='stable')
+    sel = idx[order]
+    return pd.DataFrame({
+        'Timestamp': df_analyzed[timestamp_col].to_numpy()[sel],
+        'Value': df_analyzed[value_col].to_numpy()[sel],
+        'Z-Score': z_scores[order],
+        'Rolling Mean': df_analyzed['rolling_mean'].to_numpy()[sel]
+    })
+
+
+RESULT_COLUMNS = ['rolling_mean', 'rolling_std', 'z_score', 'is_anomaly', 'upper_bound', 'lower_bound']
+
+
+PLOT_LAYOUT = dict(
+    plot_bgcolor='rgba(255,255,255,0.95)',
+    paper_bgcolor='rgba(255,255,255,0.95)',
+    font=dict(color='#333')
+)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _build_main_fig(
+    results_key: tuple,
+    timestamp_col: str,
+    value_col: str,
+    show_bounds: bool,
+    show_rolling_mean: bool,
+    _df_analyzed: pd.DataFrame
+):
+    """Build the themed time-series figure, cached on results_key and display options.
+    The cached figure is shared across reruns and must not be mutated."""
+    fig = create_time_series_plot(
+        _df_analyzed,
+        timestamp_column=timestamp_col,
+        value_column=value_col,
+        show_bounds=show_bounds,
+        show_rolling_mean=show_rolling_mean
+    )
+    fig.update_layout(**PLOT_LAYOUT)
+    return fig
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _build_z_score_fig(results_key: tuple, timestamp_col: str, threshold: float, _df_analyzed: pd.DataFrame):
+    """Build the themed z-score figure, cached on results_key.
+    The cached figure is shared across reruns and must not be mutated."""
+    fig = create_z_score_plot(
+        _df_analyzed,
+        timestamp_column=timestamp_col,
+        threshold=threshold
+    )
+    fig.update_layout(**PLOT_LAYOUT)
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _to_csv_bytes(results_key: tuple, _df: pd.DataFrame, columns=None) -> bytes:
+    """Serialize a results table to CSV, cached on results_key (file hash, columns, parameters, table)"""
+    return _df.to_csv(index=False, columns=columns).encode()
+
+
+def _request_full_csv(results_key: tuple):
+    """Mark the full results export as wanted for the given results"""
+    st.session_state['full_csv_key'] = results_key
 
 
 def create_metric_card(title, value, delta=None):
@@ -332,26 +211,25 @@ def main():
             st.markdown("### Column Selection")
             
             try:
-                # Read preview and reset file pointer
-                preview_df = pd.read_csv(uploaded_file, nrows=5)
-                uploaded_file.seek(0)  # Reset file pointer to beginning
+                # Parse once per file; reruns reuse the cached frame
+                raw_df, file_hash = _get_raw_frame(uploaded_file)
                 
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     timestamp_col = st.selectbox(
                         "Timestamp Column",
-                        options=preview_df.columns.tolist(),
+                        options=raw_df.columns.tolist(),
                         help="Select the column containing timestamps",
                         key="ts_col"
                     )
                 
                 with col2:
                     # Default to second column (index 1) if available, otherwise first column
-                    default_value_index = 1 if len(preview_df.columns) >= 2 else 0
+                    default_value_index = 1 if len(raw_df.columns) >= 2 else 0
                     value_col = st.selectbox(
                         "Value Column",
-                        options=preview_df.columns.tolist(),
+                        options=raw_df.columns.tolist(),
                         index=default_value_index,
                         help="Select the column containing numeric values",
                         key="val_col"
@@ -362,49 +240,51 @@ def main():
                 value_col = None
             
             if timestamp_col and value_col:
-                # Get parameters from session state or defaults
-                window_size = st.session_state.get('window_size', 20)
-                threshold = st.session_state.get('threshold', 2.5)
-                show_bounds = st.session_state.get('show_bounds', True)
-                show_rolling_mean = st.session_state.get('show_rolling_mean', True)
+                # Get parameters from the Settings widgets' state, which already holds
+                # this rerun's values (tab2 only copies them over after tab1 runs),
+                # falling back to the saved values or defaults
+                window_size = st.session_state.get('window_slider', st.session_state.get('window_size', 20))
+                threshold = st.session_state.get('threshold_slider', st.session_state.get('threshold', 2.5))
+                show_bounds = st.session_state.get('bounds_check', st.session_state.get('show_bounds', True))
+                show_rolling_mean = st.session_state.get('mean_check', st.session_state.get('show_rolling_mean', True))
                 
                 try:
-                    # Load data
+                    # Load data (cached on the file hash, so reruns skip preprocessing)
                     with st.spinner("Loading and preprocessing data..."):
-                        df = load_time_series_data(
-                            uploaded_file,
-                            timestamp_column=timestamp_col,
-                            value_column=value_col
-                        )
-                        validate_time_series_data(df, timestamp_col, value_col)
+                        _, meta = _load_cached(file_hash, timestamp_col, value_col, raw_df)
                     
-                    # Data overview cards
+                    # Data overview cards (metrics precomputed at load time)
                     st.markdown("### Data Overview")
                     col1, col2, col3, col4 = st.columns(4)
                     
                     with col1:
-                        st.markdown(create_metric_card("Total Points", f"{len(df):,}"), unsafe_allow_html=True)
+                        st.markdown(create_metric_card("Total Points", f"{meta['n']:,}"), unsafe_allow_html=True)
                     
                     with col2:
-                        date_range = f"{df[timestamp_col].min().date()}<br>to {df[timestamp_col].max().date()}"
+                        date_range = f"{meta['ts_min'].date()}<br>to {meta['ts_max'].date()}"
                         st.markdown(create_metric_card("Date Range", date_range), unsafe_allow_html=True)
                     
                     with col3:
-                        val_range = f"{df[value_col].min():.1f} - {df[value_col].max():.1f}"
+                        val_range = f"{meta['val_min']:.1f} - {meta['val_max']:.1f}"
                         st.markdown(create_metric_card("Value Range", val_range), unsafe_allow_html=True)
                     
                     with col4:
-                        st.markdown(create_metric_card("Mean Value", f"{df[value_col].mean():.2f}"), unsafe_allow_html=True)
+                        st.markdown(create_metric_card("Mean Value", f"{meta['val_mean']:.2f}"), unsafe_allow_html=True)
                     
                     # Detect anomalies
                     with st.spinner("Detecting anomalies..."):
-                        df_analyzed = detect_anomalies_in_time_series(
-                            df,
-                            value_column=value_col,
-                            window_size=window_size,
-                            threshold=threshold
+                        df_analyzed = _detect_cached(
+                            file_hash,
+                            timestamp_col,
+                            value_col,
+                            window_size,
+                            threshold,
+                            raw_df
                         )
                     
+                    # Identifies the analyzed results for the figure and export caches
+                    results_key = (file_hash, timestamp_col, value_col, window_size, threshold)
+                    
                     # Results summary
                     n_anomalies = df_analyzed['is_anomaly'].sum()
                     anomaly_percentage = (n_anomalies / len(df_analyzed)) * 100
@@ -440,44 +320,22 @@ def main():
                     # Visualizations
                     st.markdown("### Visualizations")
                     
-                    # Main plot
-                    fig_main = create_time_series_plot(
-                        df_analyzed,
-                        timestamp_column=timestamp_col,
-                        value_column=value_col,
-                        show_bounds=show_bounds,
-                        show_rolling_mean=show_rolling_mean
-                    )
-                    fig_main.update_layout(
-                        plot_bgcolor='rgba(255,255,255,0.95)',
-                        paper_bgcolor='rgba(255,255,255,0.95)',
-                        font=dict(color='#333')
+                    # Main plot (figures are cached, so display toggles skip rebuilding traces)
+                    fig_main = _build_main_fig(
+                        results_key, timestamp_col, value_col, show_bounds, show_rolling_mean, df_analyzed
                     )
                     st.plotly_chart(fig_main, use_container_width=True)
                     
                     # Z-score plot
                     st.markdown("#### Z-Score Analysis")
-                    fig_zscore = create_z_score_plot(
-                        df_analyzed,
-                        timestamp_column=timestamp_col,
-                        threshold=threshold
-                    )
-                    fig_zscore.update_layout(
-                        plot_bgcolor='rgba(255,255,255,0.95)',
-                        paper_bgcolor='rgba(255,255,255,0.95)',
-                        font=dict(color='#333')
-                    )
+                    fig_zscore = _build_z_score_fig(results_key, timestamp_col, threshold, df_analyzed)
                     st.plotly_chart(fig_zscore, use_container_width=True)
                     
                     # Anomaly details
                     if n_anomalies > 0:
                         st.markdown("### Anomaly Details")
                         
-                        anomaly_df = df_analyzed[df_analyzed['is_anomaly']].copy()
-                        anomaly_df = anomaly_df[[timestamp_col, value_col, 'z_score', 'rolling_mean']].copy()
-                        anomaly_df.columns = ['Timestamp', 'Value', 'Z-Score', 'Rolling Mean']
-                        anomaly_df['abs_z'] = anomaly_df['Z-Score'].abs()
-                        anomaly_df = anomaly_df.sort_values('abs_z', ascending=False).drop('abs_z', axis=1)
+                        anomaly_df = _build_anomaly_table(df_analyzed, timestamp_col, value_col)
                         
                         st.dataframe(
                             anomaly_df,
@@ -486,9 +344,10 @@ def main():
                             height=300
                         )
                         
+                        # CSV exports are cached, so reruns with unchanged results skip serialization
                         col1, col2 = st.columns(2)
                         with col1:
-                            csv_anomalies = anomaly_df.to_csv(index=False)
+                            csv_anomalies = _to_csv_bytes(results_key + ('anomalies',), anomaly_df)
                             st.download_button(
                                 "Download Anomalies (CSV)",
                                 data=csv_anomalies,
@@ -497,16 +356,29 @@ def main():
                                 use_container_width=True
                             )
                         with col2:
-                            download_df = df_analyzed[[timestamp_col, value_col, 'rolling_mean', 'rolling_std', 
-                                                      'z_score', 'is_anomaly', 'upper_bound', 'lower_bound']].copy()
-                            csv_full = download_df.to_csv(index=False)
-                            st.download_button(
-                                "Download Full Results (CSV)",
-                                data=csv_full,
-                                file_name="anomaly_detection_results.csv",
-                                mime="text/csv",
-                                use_container_width=True
-                            )
+                            # The full export is only serialized once the user asks for it
+                            # for the current results
+                            if st.session_state.get('full_csv_key') == results_key:
+                                csv_full = _to_csv_bytes(
+                                    results_key + ('full',),
+                                    df_analyzed,
+                                    columns=[timestamp_col, value_col] + RESULT_COLUMNS
+                                )
+                                st.download_button(
+                                    "Download Full Results (CSV)",
+                                    data=csv_full,
+                                    file_name="anomaly_detection_results.csv",
+                                    mime="text/csv",
+                                    use_container_width=True
+                                )
+                            else:
+                                st.button(
+                                    "Prepare Full Results (CSV)",
+                                    on_click=_request_full_csv,
+                                    args=(results_key,),
+                                    use_container_width=True,
+                                    key="prepare_full_csv"
+                                )
                     else:
                         st.info("No anomalies detected with current parameters. Try adjusting the threshold or window size in the Settings tab.")
                 
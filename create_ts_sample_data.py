@@ -5,7 +5,6 @@ Creates a CSV file with timestamp and value columns.
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import os
 
 
@@ -27,11 +26,10 @@ def create_sample_time_series(
     Returns:
         DataFrame with timestamp and value columns
     """
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     
-    # Create timestamp range
-    start = pd.to_datetime(start_date)
-    timestamps = [start + timedelta(hours=i) for i in range(n_points)]
+    # Create hourly timestamp range
+    timestamps = pd.date_range(start=start_date, periods=n_points, freq=pd.Timedelta(hours=1))
     
     # Generate base time series with trend and seasonality
     t = np.arange(n_points)
@@ -43,7 +41,7 @@ def create_sample_time_series(
     seasonal = 5 * np.sin(2 * np.pi * t / 24)  # 24-hour cycle
     
     # Random noise
-    noise = np.random.normal(0, 2, n_points)
+    noise = rng.normal(0, 2, n_points)
     
     # Base values
     values = 50 + trend + seasonal + noise
@@ -52,22 +50,23 @@ def create_sample_time_series(
     if include_anomalies:
         # Random spike anomalies
         n_anomalies = n_points // 50  # ~2% anomalies
-        anomaly_indices = np.random.choice(n_points, size=n_anomalies, replace=False)
+        anomaly_indices = rng.choice(n_points, size=n_anomalies, replace=False)
         
-        for idx in anomaly_indices:
-            # Randomly choose spike up or down
-            if np.random.random() > 0.5:
-                values[idx] += np.random.uniform(15, 30)  # Spike up
-            else:
-                values[idx] -= np.random.uniform(15, 30)  # Spike down
+        # Randomly choose spike up or down for each anomaly
+        signs = np.where(rng.random(n_anomalies) > 0.5, 1.0, -1.0)
+        magnitudes = rng.uniform(15, 30, n_anomalies)
+        values[anomaly_indices] += signs * magnitudes
         
-        # Add a few gradual drift anomalies
-        drift_indices = np.random.choice(n_points, size=n_points // 100, replace=False)
-        for idx in drift_indices:
-            # Create a small drift
-            drift_length = min(10, n_points - idx)
-            drift = np.linspace(0, np.random.uniform(10, 20), drift_length)
-            values[idx:idx+drift_length] += drift
+        # Add a few gradual drift anomalies: linear ramps of up to 10 points
+        drift_indices = rng.choice(n_points, size=n_points // 100, replace=False)
+        drift_heights = rng.uniform(10, 20, len(drift_indices))
+        drift_lengths = np.minimum(10, n_points - drift_indices)
+        steps = np.arange(10)
+        positions = drift_indices[:, None] + steps
+        ramps = drift_heights[:, None] * steps / np.maximum(drift_lengths - 1, 1)[:, None]
+        in_range = steps < drift_lengths[:, None]
+        # add.at accumulates where drifts overlap
+        np.add.at(values, positions[in_range], ramps[in_range])
     
     # Create DataFrame
     df = pd.DataFrame({
@@ -6,9 +6,153 @@ then flags anomalies when z-scores exceed a threshold.
 
 import pandas as pd
 import numpy as np
+from numba import njit
 from typing import Tuple
 
 
+# A window whose std is below ~1e-13 of its values' magnitude (compared as
+# squares: centred vs raw sum of squares) holds only rounding residue and is
+# treated as constant; relative, so it is independent of the data's units
+_REL_EPS = 1e-26
+
+
+@njit(cache=True, inline='always')
+def _window_std(s: float, s2: float, mean: float, shift: float, nobs: int, run: int, window_size: int) -> float:
+    """
+    Sample std (ddof=1) of a full window from its running sums of shifted
+    values over its nobs finite values; 0.0 for constant windows, NaN with
+    fewer than two values.
+    """
+    if nobs < 2:
+        return np.nan
+    if run >= window_size:
+        return 0.0
+    ss = s2 - s * mean
+    # Sum of squares of the unshifted values, the window's magnitude
+    raw = s2 + s * (2.0 * shift) + nobs * shift * shift
+    if ss <= _REL_EPS * raw:
+        return 0.0
+    return np.sqrt(ss / (nobs - 1))
+
+
+@njit(cache=True, boundscheck=False)
+def _detect_anomalies_fast(
+    values: np.ndarray,
+    window_size: int,
+    threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fused anomaly detection kernel.
+    Computes rolling statistics, z-scores, anomaly flags and bounds in a
+    single traversal of the values. Running sums of x and x^2 are maintained
+    over the window, so the cost is O(N) regardless of window size. The mean
+    of the first window_size-1 points uses the partial window; points in this
+    warm-up region get NaN std/z-score/bounds and are never flagged, and
+    constant windows get a z-score of 0. As in pandas rolling, NaN and +/-inf
+    are skipped: window statistics use only the finite values in the window,
+    and a non-finite point gets a NaN z-score and is never flagged. Sums are
+    accumulated in float64; statistic arrays have the same dtype as values.
+    
+    Args:
+        values: 1-D float array of values
+        window_size: Size of the rolling window
+        threshold: Z-score threshold for anomaly detection
+        
+    Returns:
+        Tuple of (rolling_mean, rolling_std, z_score, is_anomaly,
+        upper_bound, lower_bound) arrays
+    """
+    n_points = values.shape[0]
+    rolling_mean = np.empty(n_points, dtype=values.dtype)
+    rolling_std = np.empty(n_points, dtype=values.dtype)
+    z_score = np.empty(n_points, dtype=values.dtype)
+    is_anomaly = np.empty(n_points, dtype=np.bool_)
+    upper_bound = np.empty(n_points, dtype=values.dtype)
+    lower_bound = np.empty(n_points, dtype=values.dtype)
+    
+    # Accumulate values shifted by the first finite point to limit cancellation
+    # in the sum-of-squares formula when the series has a large offset
+    shift = 0.0
+    for i in range(n_points):
+        if np.isfinite(values[i]):
+            shift = np.float64(values[i])
+            break
+    s = 0.0
+    s2 = 0.0
+    # Number of finite values in the current window
+    nobs = 0
+    # Length of the current run of identical values; a window lying inside
+    # such a run has exactly zero std, independent of rounding in s and s2
+    run = 0
+    for i in range(n_points):
+        x = np.float64(values[i]) - shift
+        finite = np.isfinite(x)
+        if finite:
+            s += x
+            s2 += x * x
+            nobs += 1
+        if i >= window_size:
+            old = np.float64(values[i - window_size]) - shift
+            if np.isfinite(old):
+                s -= old
+                s2 -= old * old
+                nobs -= 1
+        
+        if not finite:
+            run = 0
+        elif i > 0 and values[i] == values[i - 1]:
+            run += 1
+        else:
+            run = 1
+        
+        mean = s / nobs if nobs > 0 else np.nan
+        rolling_mean[i] = mean + shift
+        if i < window_size - 1:
+            # Warm-up: too few points for a meaningful std or z-score
+            rolling_std[i] = np.nan
+            z_score[i] = np.nan
+            is_anomaly[i] = False
+            upper_bound[i] = np.nan
+            lower_bound[i] = np.nan
+            continue
+        
+        std = _window_std(s, s2, mean, shift, nobs, run, window_size)
+        
+        if not finite or np.isnan(std):
+            z = np.nan
+        elif std > 0.0:
+            z = (x - mean) / std
+        else:
+            # Constant window: nothing deviates, so skip the divide
+            z = 0.0
+        rolling_std[i] = std
+        z_score[i] = z
+        is_anomaly[i] = abs(z) > threshold
+        upper_bound[i] = rolling_mean[i] + threshold * std
+        lower_bound[i] = rolling_mean[i] - threshold * std
+    
+    return rolling_mean, rolling_std, z_score, is_anomaly, upper_bound, lower_bound
+
+
+def _kernel_values(series: pd.Series) -> np.ndarray:
+    """Values as a float array for the kernel: float32 data stays float32, anything else is float64."""
+    if series.dtype == np.float32:
+        return series.to_numpy()
+    return series.to_numpy(dtype=np.float64, copy=False)
+
+
+def _check_window_size(window_size: int, n_points: int) -> int:
+    """Validate the rolling window size, shrinking it to the data length if needed."""
+    if window_size < 2:
+        raise ValueError("Window size must be at least 2")
+    
+    if window_size > n_points:
+        window_size = n_points
+        print(f"Warning: Window size adjusted to {window_size} (data length)")
+    
+    return window_size
+
+
 def compute_rolling_statistics(
     df: pd.DataFrame,
     value_column: str,
@@ -16,6 +160,7 @@ def compute_rolling_statistics(
 ) -> pd.DataFrame:
     """
     Compute rolling mean and standard deviation for the time-series.
+    Columns are added to df in place; copy beforehand if the input must be preserved.
     
     Args:
         df: DataFrame with time-series data
@@ -25,22 +170,15 @@ def compute_rolling_statistics(
     Returns:
         DataFrame with added 'rolling_mean' and 'rolling_std' columns
     """
-    df = df.copy()
-    
     # Ensure window size is valid
-    if window_size < 2:
-        raise ValueError("Window size must be at least 2")
-    
-    if window_size > len(df):
-        window_size = len(df)
-        print(f"Warning: Window size adjusted to {window_size} (data length)")
+    window_size = _check_window_size(window_size, len(df))
     
-    # Compute rolling statistics
-    df['rolling_mean'] = df[value_column].rolling(window=window_size, min_periods=1).mean()
-    df['rolling_std'] = df[value_column].rolling(window=window_size, min_periods=1).std()
-    
-    # Handle edge case: if std is 0 (constant values), set to small epsilon
-    df['rolling_std'] = df['rolling_std'].replace(0, np.finfo(float).eps)
+    # Compute rolling statistics in a single O(N) pass; the fused kernel is
+    # shared with the full pipeline, keeping only mean and std
+    values = _kernel_values(df[value_column])
+    rolling_mean, rolling_std = _detect_anomalies_fast(values, window_size, 0.0)[:2]
+    df['rolling_mean'] = rolling_mean
+    df['rolling_std'] = rolling_std
     
     return df
 
@@ -52,6 +190,7 @@ def compute_z_scores(
     """
     Compute z-scores for each data point.
     z = (value - rolling_mean) / rolling_std
+    Column is added to df in place.
     
     Args:
         df: DataFrame with rolling statistics already computed
@@ -60,10 +199,9 @@ def compute_z_scores(
     Returns:
         DataFrame with added 'z_score' column
     """
-    df = df.copy()
-    
-    # Compute z-scores
-    df['z_score'] = (df[value_column] - df['rolling_mean']) / df['rolling_std']
+    # Compute z-scores; constant windows (std 0) get 0 rather than inf
+    z_score = (df[value_column] - df['rolling_mean']) / df['rolling_std']
+    df['z_score'] = z_score.mask(df['rolling_std'] == 0, 0.0)
     
     return df
 
@@ -75,6 +213,7 @@ def detect_anomalies(
     """
     Flag anomalies based on z-score threshold.
     Anomaly is flagged when |z_score| > threshold.
+    Column is added to df in place.
     
     Args:
         df: DataFrame with z-scores already computed
@@ -83,10 +222,8 @@ def detect_anomalies(
     Returns:
         DataFrame with added 'is_anomaly' boolean column
     """
-    df = df.copy()
-    
-    # Flag anomalies
-    df['is_anomaly'] = np.abs(df['z_score']) > threshold
+    # Flag anomalies (NaN z-scores from the warm-up period compare False)
+    df['is_anomaly'] = np.abs(df['z_score'].to_numpy()) > threshold
     
     return df
 
@@ -98,6 +235,7 @@ def compute_anomaly_bounds(
     """
     Compute upper and lower bounds for visualization.
     bounds = rolling_mean ± (threshold * rolling_std)
+    Columns are added to df in place.
     
     Args:
         df: DataFrame with rolling statistics already computed
@@ -106,10 +244,17 @@ def compute_anomaly_bounds(
     Returns:
         DataFrame with added 'upper_bound' and 'lower_bound' columns
     """
-    df = df.copy()
+    rolling_mean = df['rolling_mean'].to_numpy()
+    rolling_std = df['rolling_std'].to_numpy()
     
-    df['upper_bound'] = df['rolling_mean'] + (threshold * df['rolling_std'])
-    df['lower_bound'] = df['rolling_mean'] - (threshold * df['rolling_std'])
+    # Scale the std into each output buffer, then shift by the mean in place
+    upper_bound = np.multiply(rolling_std, threshold)
+    np.add(rolling_mean, upper_bound, out=upper_bound)
+    lower_bound = np.multiply(rolling_std, -threshold)
+    np.add(rolling_mean, lower_bound, out=lower_bound)
+    
+    df['upper_bound'] = upper_bound
+    df['lower_bound'] = lower_bound
     
     return df
 
@@ -126,6 +271,7 @@ def detect_anomalies_in_time_series(
     2. Compute z-scores
     3. Flag anomalies
     4. Compute bounds for visualization
+    All four steps run in one fused pass over the values.
     
     Args:
         df: DataFrame with time-series data
@@ -135,18 +281,23 @@ def detect_anomalies_in_time_series(
         
     Returns:
         DataFrame with all computed statistics and anomaly flags
+        (statistics are float32 for float32 values, float64 otherwise)
     """
-    # Step 1: Compute rolling statistics
-    df = compute_rolling_statistics(df, value_column, window_size)
-    
-    # Step 2: Compute z-scores
-    df = compute_z_scores(df, value_column)
-    
-    # Step 3: Flag anomalies
-    df = detect_anomalies(df, threshold)
+    window_size = _check_window_size(window_size, len(df))
     
-    # Step 4: Compute bounds
-    df = compute_anomaly_bounds(df, threshold)
+    # The kernel runs at the values' own precision: casting float64 data to
+    # float32 here would round away the noise of series with a large offset
+    values = _kernel_values(df[value_column])
+    rolling_mean, rolling_std, z_score, is_anomaly, upper_bound, lower_bound = _detect_anomalies_fast(
+        values, window_size, float(threshold)
+    )
     
-    return df
-
+    # Single assignment returns a new frame; the input is left untouched
+    return df.assign(
+        rolling_mean=rolling_mean,
+        rolling_std=rolling_std,
+        z_score=z_score,
+        is_anomaly=is_anomaly,
+        upper_bound=upper_bound,
+        lower_bound=lower_bound
+    )
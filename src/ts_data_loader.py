@@ -3,15 +3,159 @@ Time-series data loading and preprocessing module.
 Handles CSV loading, sorting by timestamp, and missing value handling.
 """
 
+import os
 import pandas as pd
 import numpy as np
+from numba import njit
+from pandas.tseries.api import guess_datetime_format
 from typing import Tuple, Optional
 
 
+def _parse_timestamps(timestamps: pd.Series, fmt: Optional[str] = None) -> Tuple[pd.Series, Optional[str]]:
+    """
+    Parse a column of timestamp strings to datetimes.
+    Each distinct string is parsed only once and the results are mapped back,
+    which is much cheaper when timestamps repeat. Unless given, the format is
+    guessed from the first value and passed explicitly so pandas never falls
+    back to per-element parsing. If the guess does not fit every value, ISO 8601
+    and then the day-first reading of the first value are tried; a column that
+    fits none of them is rejected rather than parsed value by value.
+    
+    Args:
+        timestamps: Series of unparsed timestamps
+        fmt: Format to parse with; guessed from the data when None
+        
+    Returns:
+        Tuple of (Series of datetimes aligned with the input, format used or
+        None if pandas inferred it)
+        
+    Raises:
+        ValueError: If the timestamps do not all match one format
+    """
+    unique_values = pd.Index(pd.unique(timestamps))
+    if fmt is not None:
+        candidates = [fmt]
+    else:
+        sample = unique_values.dropna()
+        first = str(sample[0]) if len(sample) > 0 else None
+        guessed = guess_datetime_format(first) if first is not None else None
+        if guessed is None:
+            candidates = [None]
+        else:
+            # An ambiguous first value such as 01/02/2024 is guessed month-first
+            candidates = [guessed, 'ISO8601']
+            dayfirst = guess_datetime_format(first, dayfirst=True)
+            if dayfirst is not None and dayfirst != guessed:
+                candidates.append(dayfirst)
+    
+    error = None
+    for candidate in candidates:
+        try:
+            # format=None lets pandas infer the format, as plain to_datetime does
+            parsed = pd.to_datetime(unique_values, format=candidate, cache=True)
+            fmt = candidate
+            break
+        except (ValueError, TypeError) as e:
+            # Report the mismatch against the first (guessed) format
+            error = error or e
+    else:
+        raise error
+    
+    if len(unique_values) == len(timestamps):
+        # No repeats: positions already line up with the input
+        return pd.Series(parsed, index=timestamps.index, name=timestamps.name), fmt
+    
+    lookup = pd.Series(parsed, index=unique_values)
+    return timestamps.map(lookup), fmt
+
+
+@njit(cache=True)
+def _fill_missing(values: np.ndarray) -> np.ndarray:
+    """
+    Fill missing (NaN) values in place.
+    Each gap takes the last valid value before it (forward fill); a leading
+    gap takes the first valid value (backward fill). If every value is
+    missing, all are set to 0 as a last resort.
+    
+    Args:
+        values: 1-D float array, modified in place
+        
+    Returns:
+        The filled values array
+    """
+    last = np.nan
+    for i in range(values.size):
+        if np.isnan(values[i]):
+            values[i] = last
+        else:
+            last = values[i]
+    
+    # Only the leading gap is still NaN; fill it from the right
+    last = 0.0
+    for i in range(values.size - 1, -1, -1):
+        if np.isnan(values[i]):
+            values[i] = last
+        else:
+            last = values[i]
+    return values
+
+
+def _check_columns(columns: pd.Index, timestamp_column: str, value_column: str) -> None:
+    """Raise ValueError naming the missing column if either required column is absent."""
+    if timestamp_column not in columns:
+        raise ValueError(f"Timestamp column '{timestamp_column}' not found in CSV. "
+                        f"Available columns: {list(columns)}")
+    
+    if value_column not in columns:
+        raise ValueError(f"Value column '{value_column}' not found in CSV. "
+                        f"Available columns: {list(columns)}")
+
+
+def _read_csv_chunked(
+    file_path: str,
+    timestamp_column: str,
+    value_column: str,
+    chunksize: int
+) -> pd.DataFrame:
+    """
+    Read the two required columns in chunks of chunksize rows.
+    Timestamps are parsed and values coerced to numeric per chunk, so only
+    one chunk of raw strings is held in memory at a time.
+    
+    Args:
+        file_path: Path to the CSV file or file-like object
+        timestamp_column: Name of the timestamp column
+        value_column: Name of the numeric value column
+        chunksize: Number of rows per chunk
+        
+    Returns:
+        DataFrame with parsed timestamps and numeric values, in file order
+    """
+    chunks = []
+    # The timestamp format is settled on the first chunk and reused for the rest
+    fmt = None
+    # Local files are memory-mapped rather than copied through a read buffer
+    memory_map = isinstance(file_path, (str, os.PathLike))
+    with pd.read_csv(file_path, usecols=[timestamp_column, value_column], chunksize=chunksize,
+                     memory_map=memory_map) as reader:
+        for chunk in reader:
+            if not pd.api.types.is_datetime64_any_dtype(chunk[timestamp_column]):
+                try:
+                    chunk[timestamp_column], fmt = _parse_timestamps(chunk[timestamp_column], fmt)
+                except Exception as e:
+                    raise ValueError(f"Error parsing timestamp column '{timestamp_column}': {str(e)}")
+            if chunk[value_column].dtype.kind not in 'iufb':
+                chunk[value_column] = pd.to_numeric(chunk[value_column], errors='coerce')
+            chunks.append(chunk)
+    return pd.concat(chunks, ignore_index=True)
+
+
 def load_time_series_data(
     file_path: str,
     timestamp_column: str,
-    value_column: str
+    value_column: str,
+    downcast: bool = True,
+    chunksize: Optional[int] = None
 ) -> pd.DataFrame:
     """
     Load time-series data from a CSV file.
@@ -20,6 +164,9 @@ def load_time_series_data(
         file_path: Path to the CSV file or file-like object
         timestamp_column: Name of the timestamp column
         value_column: Name of the numeric value column
+        downcast: Store float64 values as float32 when lossless (see preprocess_time_series_data)
+        chunksize: If set, read this many rows at a time to bound peak memory
+            on very large files (uses the C parser instead of pyarrow)
         
     Returns:
         DataFrame with sorted time-series data
@@ -27,51 +174,122 @@ def load_time_series_data(
     Raises:
         ValueError: If required columns are missing or data is invalid
     """
+    # Only the two required columns are parsed; the pyarrow engine reads in
+    # parallel and converts ISO-8601 timestamps while parsing
+    read_kwargs = dict(usecols=[timestamp_column, value_column], parse_dates=[timestamp_column])
     try:
         # Handle both file paths (strings) and file-like objects (e.g., Streamlit uploads)
-        df = pd.read_csv(file_path)
+        if chunksize is not None:
+            df = _read_csv_chunked(file_path, timestamp_column, value_column, chunksize)
+        else:
+            try:
+                df = pd.read_csv(file_path, engine='pyarrow', **read_kwargs)
+            except TypeError:
+                # Unusual dtypes the pyarrow engine cannot convert: retry with the C parser,
+                # memory-mapping local files and inferring dtypes over the whole column
+                if isinstance(file_path, (str, os.PathLike)):
+                    read_kwargs.update(memory_map=True, low_memory=False)
+                elif hasattr(file_path, 'seek'):
+                    file_path.seek(0)
+                df = pd.read_csv(file_path, **read_kwargs)
+            if isinstance(df[timestamp_column].dtype, pd.DatetimeTZDtype):
+                # pyarrow converts UTC-offset timestamps to UTC, losing the
+                # wall time; re-read them as text and parse them ourselves
+                if hasattr(file_path, 'seek'):
+                    file_path.seek(0)
+                df[timestamp_column] = pd.read_csv(file_path, usecols=[timestamp_column],
+                                                   dtype=str)[timestamp_column]
     except Exception as e:
+        # The readers only see the requested columns, so a missing one surfaces
+        # as a parser error; read the header to report it by name
+        try:
+            if hasattr(file_path, 'seek'):
+                file_path.seek(0)
+            columns = pd.read_csv(file_path, nrows=0).columns
+        except Exception:
+            columns = None
+        if columns is not None:
+            _check_columns(columns, timestamp_column, value_column)
         raise ValueError(f"Error reading CSV file: {str(e)}")
     
-    # Validate required columns exist
-    if timestamp_column not in df.columns:
-        raise ValueError(f"Timestamp column '{timestamp_column}' not found in CSV. "
-                        f"Available columns: {list(df.columns)}")
+    return preprocess_time_series_data(df, timestamp_column, value_column, copy=False, downcast=downcast)
+
+
+def preprocess_time_series_data(
+    df: pd.DataFrame,
+    timestamp_column: str,
+    value_column: str,
+    copy: bool = True,
+    downcast: bool = True
+) -> pd.DataFrame:
+    """
+    Prepare an already-parsed DataFrame for anomaly detection.
+    Selects the timestamp and value columns, parses timestamps, coerces
+    values to numeric, sorts by time and fills missing values.
     
-    if value_column not in df.columns:
-        raise ValueError(f"Value column '{value_column}' not found in CSV. "
-                        f"Available columns: {list(df.columns)}")
+    Args:
+        df: Raw DataFrame as read from CSV
+        timestamp_column: Name of the timestamp column
+        value_column: Name of the numeric value column
+        copy: Copy the selected columns so df is left untouched. Pass False
+            only when df is a private frame holding just these two columns.
+        downcast: Store float64 values as float32 when every value converts
+            exactly (e.g. integers or short binary fractions), halving the bytes
+            per value for the memory-bound rolling computations. Otherwise the
+            values are left as float64, so they are never rounded.
+        
+    Returns:
+        DataFrame with sorted time-series data
+        
+    Raises:
+        ValueError: If required columns are missing or data is invalid
+    """
+    # Validate required columns exist
+    _check_columns(df.columns, timestamp_column, value_column)
     
     # Select only required columns
-    df = df[[timestamp_column, value_column]].copy()
+    if copy or list(df.columns) != [timestamp_column, value_column]:
+        df = df[[timestamp_column, value_column]].copy()
     
-    # Convert timestamp to datetime
-    try:
-        df[timestamp_column] = pd.to_datetime(df[timestamp_column])
-    except Exception as e:
-        raise ValueError(f"Error parsing timestamp column '{timestamp_column}': {str(e)}")
+    # Convert timestamp to datetime (skipped if the CSV reader already did)
+    if not pd.api.types.is_datetime64_any_dtype(df[timestamp_column]):
+        try:
+            df[timestamp_column], _ = _parse_timestamps(df[timestamp_column])
+        except Exception as e:
+            raise ValueError(f"Error parsing timestamp column '{timestamp_column}': {str(e)}")
     
-    # Validate value column is numeric
-    if not pd.api.types.is_numeric_dtype(df[value_column]):
+    # Validate value column is numeric (checked on dtype.kind: integer,
+    # unsigned, float or bool columns from the parser need no conversion)
+    if df[value_column].dtype.kind not in 'iufb':
         try:
-            df[value_column] = pd.to_numeric(df[value_column], errors='coerce')
+            df[value_column] = pd.to_numeric(df[value_column], errors='coerce', downcast='float')
         except Exception:
             raise ValueError(f"Value column '{value_column}' cannot be converted to numeric")
     
-    # Sort by timestamp
-    df = df.sort_values(by=timestamp_column).reset_index(drop=True)
+    # Sort by timestamp (CSVs are usually already chronological, so check first);
+    # mergesort is stable, keeping duplicate timestamps in file order
+    if not df[timestamp_column].is_monotonic_increasing:
+        df = df.sort_values(by=timestamp_column, kind='mergesort', ignore_index=True)
+    else:
+        df.index = pd.RangeIndex(len(df))
     
     # Handle missing values gracefully
     # Forward fill for missing values, then backward fill if needed
-    initial_missing = df[value_column].isna().sum()
-    df[value_column] = df[value_column].ffill().bfill()
-    
-    # If still missing (all NaN), fill with 0 as last resort
-    df[value_column] = df[value_column].fillna(0)
+    initial_missing = int(df[value_column].isna().sum())
     
     if initial_missing > 0:
+        values = df[value_column].to_numpy(dtype=np.float64, copy=True)
+        df[value_column] = _fill_missing(values)
         print(f"Warning: {initial_missing} missing values were handled using forward/backward fill")
     
+    if downcast and df[value_column].dtype == np.float64:
+        values = df[value_column].to_numpy()
+        with np.errstate(over='ignore'):
+            narrow = values.astype(np.float32)
+        # Only when the round trip is exact, so the user's values are kept as is
+        if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+            df[value_column] = narrow
+    
     return df
 
 
@@ -3,42 +3,119 @@ Visualization module for time-series anomaly detection.
 Creates line charts with anomaly highlighting and optional statistical bounds.
 """
 
+from __future__ import annotations
+
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from typing import Optional
+import numpy as np
+from typing import Optional, TYPE_CHECKING
 
+# Plotly is imported inside the plotting functions: its import chain is slow
+# and callers that never draw a figure should not pay for it
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
-def create_time_series_plot(
-    df: pd.DataFrame,
-    timestamp_column: str,
-    value_column: str,
-    show_bounds: bool = True,
-    show_rolling_mean: bool = True
-) -> go.Figure:
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
     """
-    Create an interactive time-series plot with anomaly highlighting.
+    Select points to keep using Largest-Triangle-Three-Buckets downsampling.
+    Keeps the first and last points and, for each bucket in between, the point
+    forming the largest triangle with the previously kept point and the mean
+    of the next bucket. Preserves the visual shape (peaks and dips) of the line.
     
     Args:
-        df: DataFrame with time-series data and anomaly flags
-        timestamp_column: Name of the timestamp column
-        value_column: Name of the numeric value column
-        show_bounds: Whether to show upper/lower bounds
-        show_rolling_mean: Whether to show rolling mean line
+        x: Numeric x values (datetimes are compared as integers); points with
+            a NaN/NaT x have no position and are never selected
+        y: Numeric y values
+        n_out: Number of points to keep
         
     Returns:
-        Plotly Figure object
+        Sorted array of selected indices
+    """
+    n_points = len(x)
+    if n_out >= n_points or n_out < 3:
+        return np.arange(n_points)
+    
+    if x.dtype.kind == 'M':
+        x = np.where(np.isnat(x), np.nan, x.view(np.int64).astype(np.float64))
+    x = x.astype(np.float64, copy=False)
+    valid = ~np.isnan(x)
+    if not valid.all():
+        keep = np.flatnonzero(valid)
+        return keep[_lttb_indices(x[keep], y[keep], n_out)]
+    y = np.nan_to_num(y.astype(np.float64, copy=False), nan=0.0)
+    
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n_points - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n_points - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n_points
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    
+    return indices
+
+
+def _epoch_ms(timestamps: pd.Series) -> np.ndarray:
+    """
+    Convert timestamps to float64 milliseconds since the epoch.
+    Plotly serializes plain numbers far faster than datetimes, and a date
+    axis renders them as dates just the same. Timezone-aware timestamps keep
+    their wall time (as Plotly shows them) and NaT becomes NaN, drawn as a gap.
     """
-    fig = go.Figure()
+    if isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+        timestamps = timestamps.dt.tz_localize(None)
+    stamps = timestamps.to_numpy(dtype='datetime64[ms]')
+    ms = stamps.view(np.int64).astype(np.float64)
+    ms[np.isnat(stamps)] = np.nan
+    return ms
+
+
+def _downsample(idx: np.ndarray, x: np.ndarray, y: np.ndarray, max_points: Optional[int]) -> np.ndarray:
+    """Reduce row positions idx to at most max_points with LTTB on (x[idx], y[idx]); None keeps all."""
+    if max_points is None or len(idx) <= max_points:
+        return idx
     
-    # Separate normal and anomaly points
-    normal_df = df[~df['is_anomaly']]
-    anomaly_df = df[df['is_anomaly']]
+    return idx[_lttb_indices(x[idx], y[idx], max_points)]
+
+
+def _value_traces(
+    df: pd.DataFrame,
+    timestamps: np.ndarray,
+    value_column: str,
+    show_bounds: bool,
+    show_rolling_mean: bool,
+    max_points: Optional[int]
+) -> list:
+    """Build the value-plane traces: normal points, anomalies, rolling mean and bounds."""
+    import plotly.graph_objects as go
+    
+    traces = []
     
-    # Plot normal points
-    fig.add_trace(go.Scatter(
-        x=normal_df[timestamp_column],
-        y=normal_df[value_column],
+    # Separate normal and anomaly points by row position, slicing only the
+    # arrays that are plotted rather than materializing two sub-frames
+    mask = df['is_anomaly'].to_numpy(dtype=np.bool_)
+    values = df[value_column].to_numpy()
+    # Hover-only z-scores: float32 is plenty for two decimals and halves the payload
+    z_scores = df['z_score'].to_numpy(dtype=np.float32)
+    normal_idx = _downsample(np.flatnonzero(~mask), timestamps, values, max_points)
+    anomaly_idx = np.flatnonzero(mask)
+    
+    # Plot normal points (all traces use WebGL to keep long series responsive)
+    traces.append(go.Scattergl(
+        x=timestamps[normal_idx],
+        y=values[normal_idx],
         mode='lines+markers',
         name='Normal',
         line=dict(color='steelblue', width=2),
@@ -47,14 +124,14 @@ def create_time_series_plot(
                       'Time: %{x}<br>' +
                       'Value: %{y:.2f}<br>' +
                       'Z-score: %{customdata:.2f}<extra></extra>',
-        customdata=normal_df['z_score']
+        customdata=z_scores[normal_idx]
     ))
     
     # Plot anomalies with different color and larger markers
-    if len(anomaly_df) > 0:
-        fig.add_trace(go.Scatter(
-            x=anomaly_df[timestamp_column],
-            y=anomaly_df[value_column],
+    if len(anomaly_idx) > 0:
+        traces.append(go.Scattergl(
+            x=timestamps[anomaly_idx],
+            y=values[anomaly_idx],
             mode='markers',
             name='Anomaly',
             marker=dict(
@@ -67,14 +144,18 @@ def create_time_series_plot(
                           'Time: %{x}<br>' +
                           'Value: %{y:.2f}<br>' +
                           'Z-score: %{customdata:.2f}<extra></extra>',
-            customdata=anomaly_df['z_score']
+            customdata=z_scores[anomaly_idx]
         ))
     
+    all_idx = np.arange(len(df))
+    
     # Plot rolling mean if requested
     if show_rolling_mean:
-        fig.add_trace(go.Scatter(
-            x=df[timestamp_column],
-            y=df['rolling_mean'],
+        rolling_mean = df['rolling_mean'].to_numpy()
+        mean_idx = _downsample(all_idx, timestamps, rolling_mean, max_points)
+        traces.append(go.Scattergl(
+            x=timestamps[mean_idx],
+            y=rolling_mean[mean_idx],
             mode='lines',
             name='Rolling Mean',
             line=dict(color='green', width=2, dash='dash'),
@@ -83,9 +164,14 @@ def create_time_series_plot(
     
     # Plot bounds if requested
     if show_bounds:
-        fig.add_trace(go.Scatter(
-            x=df[timestamp_column],
-            y=df['upper_bound'],
+        upper_bound = df['upper_bound'].to_numpy()
+        lower_bound = df['lower_bound'].to_numpy()
+        # Points are selected once, on the upper bound, and reused for the
+        # lower bound so the band fill between them stays aligned
+        bound_idx = _downsample(all_idx, timestamps, upper_bound, max_points)
+        traces.append(go.Scattergl(
+            x=timestamps[bound_idx],
+            y=upper_bound[bound_idx],
             mode='lines',
             name='Upper Bound',
             line=dict(color='orange', width=1, dash='dot'),
@@ -93,9 +179,9 @@ def create_time_series_plot(
             showlegend=True
         ))
         
-        fig.add_trace(go.Scatter(
-            x=df[timestamp_column],
-            y=df['lower_bound'],
+        traces.append(go.Scattergl(
+            x=timestamps[bound_idx],
+            y=lower_bound[bound_idx],
             mode='lines',
             name='Lower Bound',
             line=dict(color='orange', width=1, dash='dot'),
@@ -104,52 +190,25 @@ def create_time_series_plot(
             fillcolor='rgba(255, 165, 0, 0.1)'
         ))
     
-    # Update layout
-    fig.update_layout(
-        title='Time-Series Anomaly Detection',
-        xaxis_title='Time',
-        yaxis_title='Value',
-        hovermode='x unified',
-        template='plotly_white',
-        height=600,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
-    )
-    
-    return fig
+    return traces
 
 
-def create_z_score_plot(
-    df: pd.DataFrame,
-    timestamp_column: str,
-    threshold: float
-) -> go.Figure:
-    """
-    Create a plot showing z-scores over time with threshold lines.
+def _z_score_traces(df: pd.DataFrame, timestamps: np.ndarray, max_points: Optional[int]) -> list:
+    """Build the z-score traces: normal and anomalous z-scores."""
+    import plotly.graph_objects as go
     
-    Args:
-        df: DataFrame with z-scores
-        timestamp_column: Name of the timestamp column
-        threshold: Z-score threshold
-        
-    Returns:
-        Plotly Figure object
-    """
-    fig = go.Figure()
+    traces = []
     
-    # Separate normal and anomaly z-scores
-    normal_df = df[~df['is_anomaly']]
-    anomaly_df = df[df['is_anomaly']]
+    # Separate normal and anomaly z-scores by row position
+    mask = df['is_anomaly'].to_numpy(dtype=np.bool_)
+    z_scores = df['z_score'].to_numpy()
+    normal_idx = _downsample(np.flatnonzero(~mask), timestamps, z_scores, max_points)
+    anomaly_idx = np.flatnonzero(mask)
     
-    # Plot normal z-scores
-    fig.add_trace(go.Scatter(
-        x=normal_df[timestamp_column],
-        y=normal_df['z_score'],
+    # Plot normal z-scores (all traces use WebGL to keep long series responsive)
+    traces.append(go.Scattergl(
+        x=timestamps[normal_idx],
+        y=z_scores[normal_idx],
         mode='lines+markers',
         name='Z-score (Normal)',
         line=dict(color='steelblue', width=2),
@@ -158,10 +217,10 @@ def create_z_score_plot(
     ))
     
     # Plot anomaly z-scores
-    if len(anomaly_df) > 0:
-        fig.add_trace(go.Scatter(
-            x=anomaly_df[timestamp_column],
-            y=anomaly_df['z_score'],
+    if len(anomaly_idx) > 0:
+        traces.append(go.Scattergl(
+            x=timestamps[anomaly_idx],
+            y=z_scores[anomaly_idx],
             mode='markers',
             name='Z-score (Anomaly)',
             marker=dict(
@@ -173,13 +232,18 @@ def create_z_score_plot(
             hovertemplate='<b>ANOMALY</b><br>Time: %{x}<br>Z-score: %{y:.2f}<extra></extra>'
         ))
     
-    # Add threshold lines
+    return traces
+
+
+def _add_threshold_lines(fig: go.Figure, threshold: float, **subplot) -> None:
+    """Add the +/- threshold and zero lines to fig (optionally to one subplot via row/col)."""
     fig.add_hline(
         y=threshold,
         line_dash="dash",
         line_color="red",
         annotation_text=f"Threshold: +{threshold}",
-        annotation_position="right"
+        annotation_position="right",
+        **subplot
     )
     
     fig.add_hline(
@@ -187,7 +251,8 @@ def create_z_score_plot(
         line_dash="dash",
         line_color="red",
         annotation_text=f"Threshold: -{threshold}",
-        annotation_position="right"
+        annotation_position="right",
+        **subplot
     )
     
     # Add zero line
@@ -195,10 +260,91 @@ def create_z_score_plot(
         y=0,
         line_dash="dot",
         line_color="gray",
-        opacity=0.5
+        opacity=0.5,
+        **subplot
     )
+
+
+_LEGEND = dict(
+    orientation="h",
+    yanchor="bottom",
+    y=1.02,
+    xanchor="right",
+    x=1
+)
+
+
+def create_time_series_plot(
+    df: pd.DataFrame,
+    timestamp_column: str,
+    value_column: str,
+    show_bounds: bool = True,
+    show_rolling_mean: bool = True,
+    max_points: Optional[int] = 2000
+) -> go.Figure:
+    """
+    Create an interactive time-series plot with anomaly highlighting.
+    
+    Args:
+        df: DataFrame with time-series data and anomaly flags
+        timestamp_column: Name of the timestamp column
+        value_column: Name of the numeric value column
+        show_bounds: Whether to show upper/lower bounds
+        show_rolling_mean: Whether to show rolling mean line
+        max_points: Maximum number of points per line trace (normal points,
+            rolling mean and each bound), LTTB downsampled; anomalies are
+            always drawn in full. None disables downsampling.
+        
+    Returns:
+        Plotly Figure object
+    """
+    import plotly.graph_objects as go
     
-    # Update layout
+    timestamps = _epoch_ms(df[timestamp_column])
+    fig = go.Figure(_value_traces(df, timestamps, value_column, show_bounds, show_rolling_mean, max_points))
+    
+    # Update layout (x values are epoch milliseconds, shown as dates)
+    fig.update_xaxes(type='date')
+    fig.update_layout(
+        title='Time-Series Anomaly Detection',
+        xaxis_title='Time',
+        yaxis_title='Value',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        legend=_LEGEND
+    )
+    
+    return fig
+
+
+def create_z_score_plot(
+    df: pd.DataFrame,
+    timestamp_column: str,
+    threshold: float,
+    max_points: Optional[int] = 2000
+) -> go.Figure:
+    """
+    Create a plot showing z-scores over time with threshold lines.
+    
+    Args:
+        df: DataFrame with z-scores
+        timestamp_column: Name of the timestamp column
+        threshold: Z-score threshold
+        max_points: Maximum number of normal z-scores to draw (LTTB downsampled);
+            anomalies are always drawn in full. None disables downsampling.
+        
+    Returns:
+        Plotly Figure object
+    """
+    import plotly.graph_objects as go
+    
+    timestamps = _epoch_ms(df[timestamp_column])
+    fig = go.Figure(_z_score_traces(df, timestamps, max_points))
+    _add_threshold_lines(fig, threshold)
+    
+    # Update layout (x values are epoch milliseconds, shown as dates)
+    fig.update_xaxes(type='date')
     fig.update_layout(
         title='Z-Scores Over Time',
         xaxis_title='Time',
@@ -206,14 +352,66 @@ def create_z_score_plot(
         hovermode='x unified',
         template='plotly_white',
         height=400,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
+        legend=_LEGEND
     )
     
     return fig
 
+
+def create_combined_plot(
+    df: pd.DataFrame,
+    timestamp_column: str,
+    value_column: str,
+    threshold: float,
+    show_bounds: bool = True,
+    show_rolling_mean: bool = True,
+    max_points: Optional[int] = 2000
+) -> go.Figure:
+    """
+    Create one figure with the time-series plot above the z-score plot.
+    Both rows share the x axis, so zooming or panning one moves the other.
+    
+    Args:
+        df: DataFrame with time-series data, z-scores and anomaly flags
+        timestamp_column: Name of the timestamp column
+        value_column: Name of the numeric value column
+        threshold: Z-score threshold
+        show_bounds: Whether to show upper/lower bounds
+        show_rolling_mean: Whether to show rolling mean line
+        max_points: Maximum number of points per line trace (see
+            create_time_series_plot). None disables downsampling.
+        
+    Returns:
+        Plotly Figure object
+    """
+    from plotly.subplots import make_subplots
+    
+    fig = make_subplots(
+        rows=2,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.08,
+        row_heights=[0.6, 0.4],
+        subplot_titles=('Time-Series Anomaly Detection', 'Z-Scores Over Time')
+    )
+    
+    timestamps = _epoch_ms(df[timestamp_column])
+    for trace in _value_traces(df, timestamps, value_column, show_bounds, show_rolling_mean, max_points):
+        fig.add_trace(trace, row=1, col=1)
+    for trace in _z_score_traces(df, timestamps, max_points):
+        fig.add_trace(trace, row=2, col=1)
+    _add_threshold_lines(fig, threshold, row=2, col=1)
+    
+    # Update layout (x values are epoch milliseconds, shown as dates)
+    fig.update_xaxes(type='date')
+    fig.update_xaxes(title_text='Time', row=2, col=1)
+    fig.update_yaxes(title_text='Value', row=1, col=1)
+    fig.update_yaxes(title_text='Z-Score', row=2, col=1)
+    fig.update_layout(
+        hovermode='x unified',
+        template='plotly_white',
+        height=900,
+        legend=_LEGEND
+    )
+    
+    return fig
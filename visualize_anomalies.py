@@ -3,6 +3,7 @@ Standalone script to visualize time-series anomaly detection.
 Run this to see the results without the Streamlit dashboard.
 """
 
+import hashlib
 import sys
 from pathlib import Path
 import pandas as pd
@@ -11,9 +12,26 @@ sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
 from ts_data_loader import load_time_series_data
 from anomaly_detector import detect_anomalies_in_time_series
-from ts_visualizer import create_time_series_plot, create_z_score_plot
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from ts_visualizer import create_combined_plot
+
+# Analyzed results are cached here as Parquet. The key covers the input file,
+# the parameters and the loading/detection source, so editing that code
+# invalidates earlier results automatically.
+CACHE_DIR = Path('.cache')
+PIPELINE_SOURCES = [
+    Path(__file__).parent / 'src' / 'ts_data_loader.py',
+    Path(__file__).parent / 'src' / 'anomaly_detector.py',
+]
+
+
+def _cache_path(data_file, timestamp_col, value_col, window_size, threshold):
+    """Parquet cache location for one (file, file version, parameters, pipeline code) combination."""
+    path = Path(data_file).resolve()
+    stat = path.stat()
+    code_hash = hashlib.md5(b''.join(src.read_bytes() for src in PIPELINE_SOURCES)).hexdigest()
+    key = (code_hash, str(path), stat.st_size, stat.st_mtime_ns,
+           timestamp_col, value_col, window_size, threshold)
+    return CACHE_DIR / f"{hashlib.md5(repr(key).encode()).hexdigest()}.parquet"
 
 
 def main():
@@ -24,49 +42,48 @@ def main():
     window_size = 20
     threshold = 2.5
     
-    print("Loading time-series data...")
-    df = load_time_series_data(data_file, timestamp_col, value_col)
-    print(f"✓ Loaded {len(df)} data points")
-    
-    print(f"\nDetecting anomalies (window={window_size}, threshold={threshold})...")
-    df_analyzed = detect_anomalies_in_time_series(
-        df,
-        value_column=value_col,
-        window_size=window_size,
-        threshold=threshold
-    )
+    cache_path = _cache_path(data_file, timestamp_col, value_col, window_size, threshold)
+    if cache_path.exists():
+        print(f"Loading cached results from {cache_path}...")
+        df_analyzed = pd.read_parquet(cache_path)
+        print(f"✓ Loaded {len(df_analyzed)} data points")
+    else:
+        print("Loading time-series data...")
+        df = load_time_series_data(data_file, timestamp_col, value_col)
+        print(f"✓ Loaded {len(df)} data points")
+        
+        print(f"\nDetecting anomalies (window={window_size}, threshold={threshold})...")
+        df_analyzed = detect_anomalies_in_time_series(
+            df,
+            value_column=value_col,
+            window_size=window_size,
+            threshold=threshold
+        )
+        
+        CACHE_DIR.mkdir(exist_ok=True)
+        df_analyzed.to_parquet(cache_path, compression='zstd')
     
     n_anomalies = df_analyzed['is_anomaly'].sum()
-    print(f"✓ Detected {n_anomalies} anomalies ({n_anomalies/len(df)*100:.2f}%)")
+    print(f"✓ Detected {n_anomalies} anomalies ({n_anomalies/len(df_analyzed)*100:.2f}%)")
     
     # Create visualizations
     print("\nCreating visualizations...")
     
-    # Main time-series plot
-    fig_main = create_time_series_plot(
+    # Time-series and z-score plots in one figure with a shared time axis
+    fig = create_combined_plot(
         df_analyzed,
         timestamp_column=timestamp_col,
         value_column=value_col,
+        threshold=threshold,
         show_bounds=True,
         show_rolling_mean=True
     )
     
-    # Z-score plot
-    fig_zscore = create_z_score_plot(
-        df_analyzed,
-        timestamp_column=timestamp_col,
-        threshold=threshold
-    )
-    
-    # Show plots
+    # Show plot
     print("\n" + "="*60)
-    print("Opening visualizations in your browser...")
+    print("Opening visualization in your browser...")
     print("="*60)
-    print("\nMain Time-Series Plot:")
-    fig_main.show()
-    
-    print("\nZ-Score Analysis Plot:")
-    fig_zscore.show()
+    fig.show()
     
     # Print summary statistics
     print("\n" + "="*60)
@@ -74,7 +91,7 @@ def main():
     print("="*60)
     print(f"Total data points: {len(df_analyzed)}")
     print(f"Anomalies detected: {n_anomalies}")
-    print(f"Anomaly rate: {n_anomalies/len(df)*100:.2f}%")
+    print(f"Anomaly rate: {n_anomalies/len(df_analyzed)*100:.2f}%")
     print(f"Window size: {window_size}")
     print(f"Threshold: {threshold}σ")
     print(f"\nValue range: {df_analyzed[value_col].min():.2f} to {df_analyzed[value_col].max():.2f}")
@@ -82,15 +99,14 @@ def main():
     print(f"Std deviation: {df_analyzed[value_col].std():.2f}")
     
     if n_anomalies > 0:
-        anomaly_df = df_analyzed[df_analyzed['is_anomaly']]
-        print(f"\nAnomaly z-scores range: {anomaly_df['z_score'].abs().min():.2f} to {anomaly_df['z_score'].abs().max():.2f}")
+        anomaly_abs_z = df_analyzed.loc[df_analyzed['is_anomaly'], 'z_score'].abs()
+        print(f"\nAnomaly z-scores range: {anomaly_abs_z.min():.2f} to {anomaly_abs_z.max():.2f}")
         print(f"\nTop 5 anomalies by z-score:")
-        # Sort by absolute z-score
-        anomaly_df_sorted = anomaly_df.copy()
-        anomaly_df_sorted['abs_z_score'] = anomaly_df_sorted['z_score'].abs()
-        top_anomalies = anomaly_df_sorted.nlargest(5, 'abs_z_score')[[timestamp_col, value_col, 'z_score']]
-        for idx, row in top_anomalies.iterrows():
-            print(f"  {row[timestamp_col]}: value={row[value_col]:.2f}, z-score={row['z_score']:.2f}")
+        # Rank by absolute z-score on the single column, then index back into the frame
+        top_idx = anomaly_abs_z.nlargest(5).index
+        top_anomalies = df_analyzed.loc[top_idx, [timestamp_col, value_col, 'z_score']]
+        for ts, val, z in top_anomalies.itertuples(index=False, name=None):
+            print(f"  {ts}: value={val:.2f}, z-score={z:.2f}")
     
     print("\n" + "="*60)
     print("Visualization complete!")